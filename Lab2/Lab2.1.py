@@ -1,4 +1,20 @@
+import mmap
+import os
 import random
+import struct
+import sys
+import tempfile
+from array import array
+
+# Binary FA file, little-endian: header, int32 tables, then utf-8 name blobs.
+# Transitions are stored row by row (state, symbol) as offsets into one
+# flat target array, since a state can move to several states at once.
+FA_MAGIC = b'LFAN'
+FA_VERSION = 1
+FA_HEADER = struct.Struct('<4sHHiiiiiii')
+INT32 = 'i' if array('i').itemsize == 4 else 'l'
+if array(INT32).itemsize != 4:
+    raise ImportError("no 4-byte array type available for the automaton file format")
 
 
 class Grammar:
@@ -164,6 +180,237 @@ def grammar_to_fa(grammar):
     return FiniteAutomaton(states, alphabet, transitions, start_state, accept_states)
 
 
+def _pack_strings(strings):
+    offsets = [0]
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode('utf-8')
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def _int32_bytes(values):
+    table = array(INT32, values)
+    if sys.byteorder != 'little':
+        table.byteswap()
+    return table.tobytes()
+
+
+def _int32_table(buf):
+    # Zero-copy on little-endian machines, which is what the file uses.
+    if sys.byteorder == 'little':
+        return buf.cast(INT32)
+    table = array(INT32)
+    table.frombytes(buf)
+    table.byteswap()
+    return memoryview(table)
+
+
+def save_fa(fa, filename):
+    states = sorted(fa.states)
+    state_index = {state: i for i, state in enumerate(states)}
+    symbols = sorted(fa.alphabet)
+    for (state, symbol), next_states in fa.transitions.items():
+        for name in [state, *next_states]:
+            if name not in state_index:
+                state_index[name] = len(states)
+                states.append(name)
+        if symbol not in symbols:
+            symbols.append(symbol)
+    symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+
+    rows = [[] for _ in range(len(states) * len(symbols))]
+    for (state, symbol), next_states in fa.transitions.items():
+        rows[state_index[state] * len(symbols) + symbol_index[symbol]] = sorted(
+            state_index[name] for name in next_states)
+    row_offsets = array(INT32, [0])
+    targets = array(INT32)
+    for row in rows:
+        targets.extend(row)
+        row_offsets.append(len(targets))
+
+    accept = bytearray(len(states))
+    for state in fa.accept_states:
+        accept[state_index[state]] = 1
+    accept += bytes(-len(accept) % 4)
+
+    name_offsets, name_blob = _pack_strings(states)
+    symbol_offsets, symbol_blob = _pack_strings(symbols)
+
+    with open(filename, 'wb') as f:
+        f.write(FA_HEADER.pack(FA_MAGIC, FA_VERSION, 0, len(states), len(symbols), len(targets),
+                               state_index[fa.start_state], len(fa.accept_states),
+                               len(name_blob), len(symbol_blob)))
+        f.write(_int32_bytes(row_offsets))
+        f.write(_int32_bytes(targets))
+        f.write(_int32_bytes(name_offsets))
+        f.write(_int32_bytes(symbol_offsets))
+        f.write(accept)
+        f.write(name_blob)
+        f.write(symbol_blob)
+
+
+class MappedFiniteAutomaton:
+    """Read-only FiniteAutomaton backed by a file written with save_fa.
+
+    Works on state indices straight from the mapped file, so loading costs
+    the same for any automaton size and worker processes share the pages.
+    """
+
+    def __init__(self, filename):
+        self._views = []
+        with open(filename, 'rb') as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"'{filename}' is not a finite automaton file") from None
+        try:
+            self._load(filename)
+        except Exception:
+            self.close()
+            raise
+
+    def _view(self, view):
+        self._views.append(view)
+        return view
+
+    def _load(self, filename):
+        self.filename = filename
+        if len(self._mm) < FA_HEADER.size:
+            raise ValueError(f"'{filename}' is not a finite automaton file")
+        (magic, version, _, self.num_states, self.num_symbols, num_targets, self.start_state,
+         self.num_accept, names_size, symbols_size) = FA_HEADER.unpack_from(self._mm)
+        if magic != FA_MAGIC or version != FA_VERSION:
+            raise ValueError(f"'{filename}' is not a finite automaton file")
+        if min(self.num_states, self.num_symbols, num_targets, names_size, symbols_size) < 0:
+            raise ValueError(f"'{filename}' has a corrupt header")
+
+        expected = (FA_HEADER.size + (self.num_states * self.num_symbols + 1) * 4 + num_targets * 4
+                    + (self.num_states + 1) * 4 + (self.num_symbols + 1) * 4
+                    + self.num_states + (-self.num_states % 4) + names_size + symbols_size)
+        if len(self._mm) != expected:
+            raise ValueError(f"'{filename}' is truncated or corrupt: "
+                             f"{len(self._mm)} bytes, expected {expected}")
+        if not 0 <= self.start_state < self.num_states:
+            raise ValueError(f"'{filename}' has a corrupt header")
+
+        buf = self._view(memoryview(self._mm))
+        pos = FA_HEADER.size
+        size = (self.num_states * self.num_symbols + 1) * 4
+        self._row_offsets = self._view(_int32_table(buf[pos:pos + size]))
+        pos += size
+        size = num_targets * 4
+        self._targets = self._view(_int32_table(buf[pos:pos + size]))
+        pos += size
+        size = (self.num_states + 1) * 4
+        self._name_offsets = self._view(_int32_table(buf[pos:pos + size]))
+        pos += size
+        size = (self.num_symbols + 1) * 4
+        symbol_offsets = self._view(_int32_table(buf[pos:pos + size]))
+        pos += size
+        self._accept = self._view(buf[pos:pos + self.num_states])
+        pos += self.num_states + (-self.num_states % 4)
+        self._names = self._view(buf[pos:pos + names_size])
+        pos += names_size
+        symbol_blob = bytes(buf[pos:pos + symbols_size])
+
+        if any(not 0 <= symbol_offsets[i] <= symbol_offsets[i + 1] <= symbols_size
+               for i in range(self.num_symbols)):
+            raise ValueError(f"'{filename}' is corrupt")
+        self.alphabet = [symbol_blob[symbol_offsets[i]:symbol_offsets[i + 1]].decode('utf-8')
+                         for i in range(self.num_symbols)]
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.alphabet)}
+        self._state_index = None
+
+    # The tables are only checked where they are read, so loading stays
+    # independent of the automaton size.
+    def _corrupt(self):
+        return ValueError(f"'{self.filename}' is corrupt")
+
+    def state_name(self, index):
+        start, end = self._name_offsets[index], self._name_offsets[index + 1]
+        if not 0 <= start <= end <= len(self._names):
+            raise self._corrupt()
+        return bytes(self._names[start:end]).decode('utf-8')
+
+    def state_index(self, name):
+        if self._state_index is None:
+            self._state_index = {self.state_name(i): i for i in range(self.num_states)}
+        return self._state_index[name]
+
+    def is_accept(self, index):
+        return self._accept[index] == 1
+
+    def next_states(self, index, symbol):
+        symbol_index = self._symbol_index.get(symbol)
+        if symbol_index is None:
+            return ()
+        row = index * self.num_symbols + symbol_index
+        start, end = self._row_offsets[row], self._row_offsets[row + 1]
+        if not 0 <= start <= end <= len(self._targets):
+            raise self._corrupt()
+        # A copy, so no view into the mapping outlives close().
+        next_states = tuple(self._targets[start:end])
+        if any(not 0 <= next_state < self.num_states for next_state in next_states):
+            raise self._corrupt()
+        return next_states
+
+    def accepts(self, input_string):
+        current_states = self._epsilon_closure({self.start_state})
+
+        for symbol in input_string:
+            if not current_states:
+                return False
+
+            next_states = set()
+            for state in current_states:
+                next_states.update(self.next_states(state, symbol))
+
+            current_states = self._epsilon_closure(next_states)
+
+        return any(self.is_accept(state) for state in current_states)
+
+    def _epsilon_closure(self, states):
+        closure = set(states)
+        stack = list(states)
+
+        while stack:
+            state = stack.pop()
+            for next_state in self.next_states(state, ''):
+                if next_state not in closure:
+                    closure.add(next_state)
+                    stack.append(next_state)
+        return closure
+
+    def to_fa(self):
+        names = [self.state_name(i) for i in range(self.num_states)]
+        transitions = {}
+        for i, name in enumerate(names):
+            for symbol in self.alphabet:
+                next_states = self.next_states(i, symbol)
+                if len(next_states):
+                    transitions[(name, symbol)] = {names[j] for j in next_states}
+        return FiniteAutomaton(set(names), {symbol for symbol in self.alphabet if symbol},
+                               transitions, names[self.start_state],
+                               {names[i] for i in range(self.num_states) if self.is_accept(i)})
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_fa(filename):
+    return MappedFiniteAutomaton(filename)
+
+
 if __name__ == "__main__":
     grammar = Grammar()
     valid_strings, derivations = grammar.generate_strings_with_derivation(5)
@@ -188,5 +435,11 @@ if __name__ == "__main__":
         result = "correct" if is_accepted else "wrong"
         print(f"String {test_string} is {result}")
 
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fa.bin')
+        save_fa(fa, path)
+        with load_fa(path) as mapped:
+            print("\nFA loaded from binary file accepts 'cde'?", mapped.accepts('cde'))
+
     print("\nGrammar Classification:")
     print(grammar.classify_grammar())
\ No newline at end of file
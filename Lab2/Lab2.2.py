@@ -1,4 +1,18 @@
-from graphviz import Digraph
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections import deque
+
+# Binary DFA file, little-endian: header, int32 tables, then utf-8 name blobs.
+DFA_MAGIC = b'LFAD'
+DFA_VERSION = 1
+DFA_HEADER = struct.Struct('<4sHHiiiiii')
+INT32 = 'i' if array('i').itemsize == 4 else 'l'
+if array(INT32).itemsize != 4:
+    raise ImportError("no 4-byte array type available for the DFA file format")
 
 def convert_to_regular_grammar(ndfa):
     productions = {}
@@ -72,7 +86,357 @@ def convert_ndfa_to_dfa(ndfa):
             }
     return dfa
 
+def _pack_strings(strings):
+    offsets = [0]
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode('utf-8')
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+def _int32_bytes(values):
+    table = array(INT32, values)
+    if sys.byteorder != 'little':
+        table.byteswap()
+    return table.tobytes()
+
+def _int32_table(buf):
+    # Zero-copy on little-endian machines, which is what the file uses.
+    if sys.byteorder == 'little':
+        return buf.cast(INT32)
+    table = array(INT32)
+    table.frombytes(buf)
+    table.byteswap()
+    return memoryview(table)
+
+def _single_target(next_state):
+    if isinstance(next_state, (set, frozenset)):
+        if len(next_state) != 1:
+            raise ValueError("save_dfa needs a deterministic automaton")
+        next_state, = next_state
+    return next_state
+
+def save_dfa(dfa, filename):
+    states = sorted(dfa['states'])
+    state_index = {state: i for i, state in enumerate(states)}
+    for trans in dfa['transitions'].values():
+        for next_state in trans.values():
+            next_state = _single_target(next_state)
+            if next_state not in state_index:
+                state_index[next_state] = len(states)
+                states.append(next_state)
+    symbols = sorted(dfa['alphabet'])
+    symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+
+    table = array(INT32, [-1]) * (len(states) * len(symbols))
+    for state, trans in dfa['transitions'].items():
+        for symbol, next_state in trans.items():
+            table[state_index[state] * len(symbols) + symbol_index[symbol]] = state_index[_single_target(next_state)]
+
+    final = bytearray(len(states))
+    for state in dfa['final_states']:
+        final[state_index[state]] = 1
+    final += bytes(-len(final) % 4)
+
+    name_offsets, name_blob = _pack_strings(states)
+    symbol_offsets, symbol_blob = _pack_strings(symbols)
+
+    with open(filename, 'wb') as f:
+        f.write(DFA_HEADER.pack(DFA_MAGIC, DFA_VERSION, 0, len(states), len(symbols),
+                                state_index[dfa['initial_state']], len(dfa['final_states']),
+                                len(name_blob), len(symbol_blob)))
+        f.write(_int32_bytes(table))
+        f.write(_int32_bytes(name_offsets))
+        f.write(_int32_bytes(symbol_offsets))
+        f.write(final)
+        f.write(name_blob)
+        f.write(symbol_blob)
+
+class MappedDFA:
+    """Read-only DFA backed by a file written with save_dfa.
+
+    The transition table is a view into the mapped file, so loading does
+    not depend on the automaton size and processes that map the same file
+    share its pages. State names are decoded only when asked for.
+    """
+
+    def __init__(self, filename):
+        self._views = []
+        with open(filename, 'rb') as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"'{filename}' is not a DFA file") from None
+        try:
+            self._load(filename)
+        except Exception:
+            self.close()
+            raise
+
+    def _view(self, view):
+        self._views.append(view)
+        return view
+
+    def _load(self, filename):
+        self.filename = filename
+        if len(self._mm) < DFA_HEADER.size:
+            raise ValueError(f"'{filename}' is not a DFA file")
+        (magic, version, _, self.num_states, self.num_symbols, self.initial_state,
+         self.num_final, names_size, symbols_size) = DFA_HEADER.unpack_from(self._mm)
+        if magic != DFA_MAGIC or version != DFA_VERSION:
+            raise ValueError(f"'{filename}' is not a DFA file")
+        if min(self.num_states, self.num_symbols, names_size, symbols_size) < 0:
+            raise ValueError(f"'{filename}' has a corrupt header")
+
+        expected = (DFA_HEADER.size + self.num_states * self.num_symbols * 4
+                    + (self.num_states + 1) * 4 + (self.num_symbols + 1) * 4
+                    + self.num_states + (-self.num_states % 4) + names_size + symbols_size)
+        if len(self._mm) != expected:
+            raise ValueError(f"'{filename}' is truncated or corrupt: "
+                             f"{len(self._mm)} bytes, expected {expected}")
+        if not 0 <= self.initial_state < self.num_states:
+            raise ValueError(f"'{filename}' has a corrupt header")
+
+        buf = self._view(memoryview(self._mm))
+        pos = DFA_HEADER.size
+        size = self.num_states * self.num_symbols * 4
+        self._table = self._view(_int32_table(buf[pos:pos + size]))
+        pos += size
+        size = (self.num_states + 1) * 4
+        self._name_offsets = self._view(_int32_table(buf[pos:pos + size]))
+        pos += size
+        size = (self.num_symbols + 1) * 4
+        symbol_offsets = self._view(_int32_table(buf[pos:pos + size]))
+        pos += size
+        self._final = self._view(buf[pos:pos + self.num_states])
+        pos += self.num_states + (-self.num_states % 4)
+        self._names = self._view(buf[pos:pos + names_size])
+        pos += names_size
+        symbol_blob = bytes(buf[pos:pos + symbols_size])
+
+        if any(not 0 <= symbol_offsets[i] <= symbol_offsets[i + 1] <= symbols_size
+               for i in range(self.num_symbols)):
+            raise ValueError(f"'{filename}' is corrupt")
+        self.alphabet = [symbol_blob[symbol_offsets[i]:symbol_offsets[i + 1]].decode('utf-8')
+                         for i in range(self.num_symbols)]
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.alphabet)}
+        self._state_index = None
+
+    # The tables are only checked where they are read, so loading stays
+    # independent of the automaton size.
+    def _corrupt(self):
+        return ValueError(f"'{self.filename}' is corrupt")
+
+    def state_name(self, index):
+        start, end = self._name_offsets[index], self._name_offsets[index + 1]
+        if not 0 <= start <= end <= len(self._names):
+            raise self._corrupt()
+        return bytes(self._names[start:end]).decode('utf-8')
+
+    def state_index(self, name):
+        if self._state_index is None:
+            self._state_index = {self.state_name(i): i for i in range(self.num_states)}
+        return self._state_index[name]
+
+    def is_final(self, index):
+        return self._final[index] == 1
+
+    def next_state(self, index, symbol):
+        symbol_index = self._symbol_index.get(symbol)
+        if symbol_index is None:
+            return -1
+        next_state = self._table[index * self.num_symbols + symbol_index]
+        if not -1 <= next_state < self.num_states:
+            raise self._corrupt()
+        return next_state
+
+    def accepts(self, input_string):
+        current = self.initial_state
+        for symbol in input_string:
+            current = self.next_state(current, symbol)
+            if current < 0:
+                return False
+        return self.is_final(current)
+
+    def to_dict(self):
+        names = [self.state_name(i) for i in range(self.num_states)]
+        transitions = {}
+        for i, name in enumerate(names):
+            row = {}
+            for symbol in self.alphabet:
+                next_state = self.next_state(i, symbol)
+                if next_state >= 0:
+                    row[symbol] = names[next_state]
+            transitions[name] = row
+        return {
+            'states': names,
+            'alphabet': list(self.alphabet),
+            'initial_state': names[self.initial_state],
+            'final_states': [names[i] for i in range(self.num_states) if self.is_final(i)],
+            'transitions': transitions
+        }
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def load_dfa(filename):
+    return MappedDFA(filename)
+
+# Missing transitions go to an implicit dead state, written as None.
+_PRODUCT_OPERATIONS = {
+    'intersection': lambda a, b: a and b,
+    'union': lambda a, b: a or b,
+    'difference': lambda a, b: a and not b,
+    'symmetric_difference': lambda a, b: a != b,
+}
+
+def _step(transitions, state, symbol):
+    if state is None:
+        return None
+    next_state = transitions.get(state, {}).get(symbol)
+    if next_state is None:
+        return None
+    return _single_target(next_state)
+
+def _product_search(dfa1, dfa2, operation, stop_on_accept):
+    accept = _PRODUCT_OPERATIONS[operation]
+    alphabet = sorted(set(dfa1['alphabet']) | set(dfa2['alphabet']))
+    trans1, trans2 = dfa1['transitions'], dfa2['transitions']
+    final1, final2 = set(dfa1['final_states']), set(dfa2['final_states'])
+
+    initial = (dfa1['initial_state'], dfa2['initial_state'])
+    parents = {initial: None}
+    queue = deque([initial])
+    while queue:
+        pair = queue.popleft()
+        a, b = pair
+        if stop_on_accept and accept(a in final1, b in final2):
+            word = []
+            while parents[pair] is not None:
+                pair, symbol = parents[pair]
+                word.append(symbol)
+            return ''.join(reversed(word)), parents
+        for symbol in alphabet:
+            next_pair = (_step(trans1, a, symbol), _step(trans2, b, symbol))
+            if next_pair in parents:
+                continue
+            # Pairs that can never reach an accepting pair are not explored.
+            if next_pair == (None, None):
+                continue
+            if operation == 'intersection' and None in next_pair:
+                continue
+            if operation == 'difference' and next_pair[0] is None:
+                continue
+            parents[next_pair] = (pair, symbol)
+            queue.append(next_pair)
+    return None, parents
+
+def shortest_product_word(dfa1, dfa2, operation):
+    word, _ = _product_search(dfa1, dfa2, operation, stop_on_accept=True)
+    return word
+
+def product_dfa(dfa1, dfa2, operation):
+    _, parents = _product_search(dfa1, dfa2, operation, stop_on_accept=False)
+    accept = _PRODUCT_OPERATIONS[operation]
+    alphabet = sorted(set(dfa1['alphabet']) | set(dfa2['alphabet']))
+    trans1, trans2 = dfa1['transitions'], dfa2['transitions']
+    final1, final2 = set(dfa1['final_states']), set(dfa2['final_states'])
+
+    # States are numbered in BFS order; 'pairs' maps each name back to the
+    # (dfa1 state, dfa2 state) it stands for, with None for the dead state.
+    names = {pair: f"p{i}" for i, pair in enumerate(parents)}
+
+    dfa = {
+        'states': list(names.values()),
+        'alphabet': alphabet,
+        'initial_state': names[(dfa1['initial_state'], dfa2['initial_state'])],
+        'final_states': [names[pair] for pair in parents if accept(pair[0] in final1, pair[1] in final2)],
+        'transitions': {},
+        'pairs': {name: pair for pair, name in names.items()}
+    }
+    for a, b in parents:
+        row = {}
+        for symbol in alphabet:
+            next_pair = (_step(trans1, a, symbol), _step(trans2, b, symbol))
+            if next_pair in names:
+                row[symbol] = names[next_pair]
+        dfa['transitions'][names[(a, b)]] = row
+    return dfa
+
+def check_equivalence(dfa1, dfa2):
+    # Hopcroft-Karp: merge the two start states and keep merging the
+    # successors, failing as soon as an accepting and a rejecting state
+    # end up in the same class.
+    alphabet = sorted(set(dfa1['alphabet']) | set(dfa2['alphabet']))
+    trans1, trans2 = dfa1['transitions'], dfa2['transitions']
+    final1, final2 = set(dfa1['final_states']), set(dfa2['final_states'])
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    stack = [(dfa1['initial_state'], dfa2['initial_state'])]
+    while stack:
+        a, b = stack.pop()
+        root1, root2 = find((1, a)), find((2, b))
+        if root1 == root2:
+            continue
+        if (a in final1) != (b in final2):
+            # BFS over the product gives the shortest distinguishing word.
+            return False, shortest_product_word(dfa1, dfa2, 'symmetric_difference')
+        parent[root1] = root2
+        for symbol in alphabet:
+            stack.append((_step(trans1, a, symbol), _step(trans2, b, symbol)))
+    return True, None
+
+def _merged_edges(fa, state):
+    # One edge per target, labelled with every symbol that leads there.
+    edges = {}
+    for symbol, next_state in fa['transitions'].get(state, {}).items():
+        targets = next_state if isinstance(next_state, (set, frozenset)) else [next_state]
+        for ns in targets:
+            edges.setdefault(ns, []).append(symbol)
+    return [(ns, ', '.join(sorted(symbols))) for ns, symbols in edges.items()]
+
+def _dot_id(name):
+    return '"' + str(name).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def _neighbourhood(fa, start, depth, max_states):
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        if depth is not None and distances[state] >= depth:
+            continue
+        for ns, _ in _merged_edges(fa, state):
+            if ns in distances:
+                continue
+            if max_states is not None and len(distances) >= max_states:
+                return distances
+            distances[ns] = distances[state] + 1
+            queue.append(ns)
+    return distances
+
 def draw_fa(fa, filename, title):
+    try:
+        from graphviz import Digraph, ExecutableNotFound
+    except ImportError:
+        print(f"graphviz is not installed, skipping '{filename}.png' (use write_dot instead)")
+        return
+
     dot = Digraph(comment=title)
     dot.attr(rankdir='LR')
 
@@ -82,20 +446,58 @@ def draw_fa(fa, filename, title):
         else:
             dot.node(state, shape='circle')
 
-    for state, transitions in fa['transitions'].items():
-        for symbol, next_state in transitions.items():
-            if isinstance(next_state, set):  # Handle sets of states
-                for ns in next_state:
-                    dot.edge(state, ns, label=symbol)
-            else:  # Handle single state
-                dot.edge(state, next_state, label=symbol)
+    for state in fa['transitions']:
+        for next_state, label in _merged_edges(fa, state):
+            dot.edge(state, next_state, label=label)
 
     dot.node('start', shape='point')
     dot.edge('start', fa['initial_state'])
 
-    dot.render(filename, format='png', cleanup=True)
+    try:
+        dot.render(filename, format='png', cleanup=True)
+    except ExecutableNotFound:
+        print(f"graphviz 'dot' executable not found, skipping '{filename}.png' (use write_dot instead)")
+        return
     print(f"{title} graph saved as '{filename}.png'")
 
+def write_dot(fa, filename, title, start=None, depth=None, max_states=None):
+    # Writes DOT text line by line, so large automata need neither the
+    # graphviz package nor the whole graph in memory. With depth or
+    # max_states only the BFS neighbourhood of start is written; states
+    # whose edges were cut off are drawn dashed.
+    if max_states is not None and max_states < 1:
+        raise ValueError(f"max_states must be at least 1, got {max_states}")
+    if depth is not None and depth < 0:
+        raise ValueError(f"depth must not be negative, got {depth}")
+    if start is None:
+        start = fa['initial_state']
+    if depth is None and max_states is None:
+        states = list(fa['states'])
+    else:
+        states = list(_neighbourhood(fa, start, depth, max_states))
+    included = set(states)
+    final_states = set(fa['final_states'])
+
+    with open(f"{filename}.dot", 'w', encoding='utf-8') as f:
+        f.write(f"// {title}\n")
+        f.write("digraph {\n")
+        f.write("    rankdir=LR\n")
+        for state in states:
+            # Each node is followed by its own edges, so the edges are
+            # merged once per state; DOT allows edges to nodes declared later.
+            shape = 'doublecircle' if state in final_states else 'circle'
+            edges = _merged_edges(fa, state)
+            style = '' if all(ns in included for ns, _ in edges) else ' style=dashed'
+            f.write(f"    {_dot_id(state)} [shape={shape}{style}]\n")
+            for next_state, label in edges:
+                if next_state in included:
+                    f.write(f"    {_dot_id(state)} -> {_dot_id(next_state)} [label={_dot_id(label)}]\n")
+        if fa['initial_state'] in included:
+            f.write("    start [shape=point]\n")
+            f.write(f"    start -> {_dot_id(fa['initial_state'])}\n")
+        f.write("}\n")
+    print(f"{title} graph written as '{filename}.dot' ({len(states)} states)")
+
 def main():
     # Define the NDFA for Variant 2
     ndfa = {
@@ -132,7 +534,32 @@ def main():
         for sym, next_state in dfa['transitions'][state].items():
             print(f"{state} --{sym}--> {next_state}")
 
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dfa.bin')
+        save_dfa(dfa, path)
+        with load_dfa(path) as mapped:
+            print("\nDFA loaded from binary file accepts 'abb'?", mapped.accepts('abb'))
+
+    # Check the conversion against a DFA written by hand for abc?a*b
+    expected = {
+        'states': ['p0', 'p1', 'p2', 'p3', 'p4'],
+        'alphabet': ['a', 'b', 'c'],
+        'initial_state': 'p0',
+        'final_states': ['p4'],
+        'transitions': {
+            'p0': {'a': 'p1'},
+            'p1': {'b': 'p2'},
+            'p2': {'a': 'p3', 'b': 'p4', 'c': 'p3'},
+            'p3': {'a': 'p3', 'b': 'p4'}
+        }
+    }
+    print("\nEquivalent to expected DFA?", check_equivalence(dfa, expected))
+    del expected['transitions']['p2']['c']
+    print("Equivalent without 'c'?", check_equivalence(dfa, expected))
+    print("Shortest word in DFA but not in the second one:", shortest_product_word(dfa, expected, 'difference'))
+
     # Task d: Represent the FA graphically
+    write_dot(dfa, 'dfa_graph', 'DFA')
     draw_fa(ndfa, 'ndfa_graph', 'NDFA')
     draw_fa(dfa, 'dfa_graph', 'DFA')
 
@@ -166,10 +166,216 @@ class RegexGenerator:
 
         return combinations
 
+    def token_values(self, token, token_type):
+        if token_type == 'literal':
+            return {token}
+        if token_type == 'zero_or_more':
+            return {token[0] * n for n in range(self.max_repetitions + 1)}
+        if token_type in ('one_or_more', 'one_or_more_pow'):
+            return {token[0] * n for n in range(1, self.max_repetitions + 1)}
+        if token_type == 'optional':
+            return {'', token[0]}
+        if token_type in ('repeat', 'repeat_pow'):
+            match = re.match(r'([A-Za-z0-9δ])\^?(\d+)', token)
+            if match:
+                char, cnt = match.groups()
+                return {char * int(cnt)}
+            return {token}
+        if token_type == 'group':
+            alternatives, possible_counts = self.parse_group(token)
+            values = set()
+            for repeat_count in possible_counts:
+                if repeat_count > 0:
+                    values.update(alt * repeat_count for alt in alternatives)
+                else:
+                    values.add("")
+            return values
+        return {token}
+
+    def compile(self, regex_str):
+        self.steps = []
+        self.steps.append(f"Compiling regex: '{regex_str}'")
+
+        tokens = self.tokenize(regex_str)
+        token_sets = [self.token_values(token, token_type) for token, token_type in tokens]
+        compiled = CompiledRegex(regex_str, token_sets)
+        self.steps.append(f"3. Built DFA with {len(compiled.transitions)} states, "
+                          f"{compiled.count()} distinct strings")
+        return compiled
+
+    def count_distinct(self, regex_str):
+        return self.compile(regex_str).count()
+
+    def sample_distinct(self, regex_str, k, seed=None):
+        return self.compile(regex_str).sample(k, seed)
+
+    def enumerate_all(self, regex_str, max_count=10000):
+        return self.compile(regex_str).enumerate(max_count)
+
     def get_processing_steps(self):
         return self.steps
 
 
+class CompiledRegex:
+    """DFA for the finite language of a tokenized regex.
+
+    Strings are ranked in lexicographic order (a string comes before its
+    extensions), so every distinct string has exactly one rank in
+    range(count()). Sampling picks distinct ranks and unranks them, so no
+    string is generated twice and no retries are needed.
+    """
+
+    def __init__(self, regex_str, token_sets):
+        self.regex_str = regex_str
+        self.token_sets = token_sets
+        self.prefixes = []
+        for values in token_sets:
+            prefixes = set()
+            for value in values:
+                for i in range(len(value) + 1):
+                    prefixes.add(value[:i])
+            self.prefixes.append(prefixes)
+
+        self.initial_state = self._closure({(0, '')})
+        self.transitions = {}
+        self.final_states = set()
+        self._build_dfa()
+        self.counts = self._count_paths()
+
+    def _closure(self, states):
+        # A completed token value moves on to the next token without
+        # consuming input, like an epsilon transition.
+        closure = set(states)
+        stack = list(states)
+        while stack:
+            index, prefix = stack.pop()
+            if index < len(self.token_sets) and prefix in self.token_sets[index]:
+                next_state = (index + 1, '')
+                if next_state not in closure:
+                    closure.add(next_state)
+                    stack.append(next_state)
+        return frozenset(closure)
+
+    def _build_dfa(self):
+        end = (len(self.token_sets), '')
+        queue = [self.initial_state]
+        self.transitions[self.initial_state] = None
+        while queue:
+            current = queue.pop()
+            if end in current:
+                self.final_states.add(current)
+
+            moves = {}
+            for index, prefix in current:
+                if index == len(self.token_sets):
+                    continue
+                for candidate in self.prefixes[index]:
+                    if len(candidate) == len(prefix) + 1 and candidate.startswith(prefix):
+                        moves.setdefault(candidate[-1], set()).add((index, candidate))
+
+            self.transitions[current] = {}
+            for symbol in sorted(moves):
+                next_state = self._closure(moves[symbol])
+                self.transitions[current][symbol] = next_state
+                if next_state not in self.transitions:
+                    self.transitions[next_state] = None
+                    queue.append(next_state)
+
+    def _count_paths(self):
+        # The language is finite, so the DFA is acyclic and a post-order
+        # walk visits every successor before the state itself.
+        counts = {}
+        stack = [(self.initial_state, False)]
+        while stack:
+            state, expanded = stack.pop()
+            if state in counts:
+                continue
+            if expanded:
+                total = 1 if state in self.final_states else 0
+                for next_state in self.transitions[state].values():
+                    total += counts[next_state]
+                counts[state] = total
+            else:
+                stack.append((state, True))
+                for next_state in self.transitions[state].values():
+                    if next_state not in counts:
+                        stack.append((next_state, False))
+        return counts
+
+    def count(self):
+        return self.counts[self.initial_state]
+
+    def unrank(self, rank):
+        if not 0 <= rank < self.count():
+            raise IndexError(f"rank {rank} out of range for {self.count()} strings")
+
+        result = []
+        state = self.initial_state
+        while True:
+            if state in self.final_states:
+                if rank == 0:
+                    return ''.join(result)
+                rank -= 1
+            for symbol, next_state in self.transitions[state].items():
+                if rank < self.counts[next_state]:
+                    result.append(symbol)
+                    state = next_state
+                    break
+                rank -= self.counts[next_state]
+
+    def rank(self, string):
+        rank = 0
+        state = self.initial_state
+        for char in string:
+            if state in self.final_states:
+                rank += 1
+            if char not in self.transitions[state]:
+                raise ValueError(f"'{string}' is not generated by '{self.regex_str}'")
+            for symbol, next_state in self.transitions[state].items():
+                if symbol == char:
+                    break
+                rank += self.counts[next_state]
+            state = self.transitions[state][char]
+        if state not in self.final_states:
+            raise ValueError(f"'{string}' is not generated by '{self.regex_str}'")
+        return rank
+
+    def sample(self, k, seed=None):
+        if seed is not None:
+            random.seed(seed)
+
+        total = self.count()
+        if not 0 <= k <= total:
+            raise ValueError(f"cannot sample {k} distinct strings from {total}")
+
+        # Floyd's algorithm: k distinct ranks with k calls to randrange,
+        # which also works when total does not fit in a machine word.
+        ranks = set()
+        for j in range(total - k, total):
+            r = random.randrange(j + 1)
+            ranks.add(j if r in ranks else r)
+        ranks = list(ranks)
+        random.shuffle(ranks)
+        return [self.unrank(r) for r in ranks]
+
+    def enumerate(self, max_count=10000):
+        # Checked here rather than in the generator so that an oversized
+        # language fails when enumerate is called, not on the first next().
+        if max_count is not None and self.count() > max_count:
+            raise ValueError(f"'{self.regex_str}' has {self.count()} distinct strings, "
+                             f"more than max_count={max_count}")
+        return self._enumerate()
+
+    def _enumerate(self):
+        stack = [(self.initial_state, '')]
+        while stack:
+            state, prefix = stack.pop()
+            if state in self.final_states:
+                yield prefix
+            for symbol, next_state in reversed(self.transitions[state].items()):
+                stack.append((next_state, prefix + symbol))
+
+
 def main():
     generator = RegexGenerator(max_repetitions=5)
 
@@ -190,6 +396,10 @@ def main():
         for step in generator.get_processing_steps():
             print(f"  {step}")
 
+        compiled = generator.compile(regex)
+        print(f"\nDistinct strings: {compiled.count()}")
+        print(f"Distinct sample: {compiled.sample(min(5, compiled.count()))}")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file